@@ -0,0 +1,38 @@
+"""
+Compression Middleware
+
+Starlette's GZipMiddleware with a per-path opt-out, for streaming endpoints whose
+chunks must reach the client as soon as they are produced. Strong ETags on
+compressed responses are made weak, since the gzip and identity bodies differ.
+"""
+
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware as _GZipMiddleware
+
+
+class GZipMiddleware(_GZipMiddleware):
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 9, exclude_paths=()):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            # gzip buffers until its block fills, which would stall NDJSON streams
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = dict(scope["headers"]).get(b"if-none-match", b"").decode("latin-1")
+
+        async def send_weak_etag(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    compressed = headers.get("content-encoding") == "gzip"
+                    # a 304 revalidating the gzip body must repeat the weak tag it was given
+                    revalidated = message["status"] == 304 and f"W/{etag}" in if_none_match
+                    if compressed or revalidated:
+                        headers["etag"] = "W/" + etag
+            await send(message)
+
+        await super().__call__(scope, receive, send_weak_etag)
@@ -0,0 +1,75 @@
+"""
+CORS Middleware
+
+Pure ASGI CORS handling with headers computed once at import time.
+Allowed origins come from CORS_ALLOW_ORIGINS (comma separated, default "*").
+Credentials are allowed, so the request Origin is echoed back rather than "*".
+"""
+
+import os
+
+allow_origins = {o.strip() for o in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip()}
+allow_all_origins = "*" in allow_origins
+
+CORS_HEADERS = [
+    (b"access-control-allow-credentials", b"true"),
+    (b"vary", b"Origin"),
+]
+
+PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"600"),
+    (b"content-length", b"0"),
+]
+
+
+def _origin_allowed(origin: bytes) -> bool:
+    return allow_all_origins or origin.decode("latin-1") in allow_origins
+
+
+class CORSMiddleware:
+    """Answers preflights directly and tags other responses with CORS headers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin")
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            await self._preflight(send, origin, headers.get(b"access-control-request-headers"))
+            return
+
+        if not _origin_allowed(origin):
+            await self.app(scope, receive, send)
+            return
+
+        extra = CORS_HEADERS + [(b"access-control-allow-origin", origin)]
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + extra
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    @staticmethod
+    async def _preflight(send, origin, request_headers):
+        if not _origin_allowed(origin):
+            await send({"type": "http.response.start", "status": 400, "headers": [(b"content-length", b"0")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = PREFLIGHT_HEADERS + [(b"access-control-allow-origin", origin)]
+        if request_headers:
+            headers.append((b"access-control-allow-headers", request_headers))
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
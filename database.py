@@ -6,28 +6,83 @@ Import and use these functions in your API endpoints for database operations.
 """
 
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
 load_dotenv()
 
-_client = None
-db = None
-
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
-if database_url and database_name:
-    _client = MongoClient(database_url)
-    db = _client[database_name]
+# Sync (PyMongo) client, only built on first use by the sync helpers
+_client = None
+_db = None
+
+def get_db():
+    """Return the sync database handle, creating the client on first call"""
+    global _client, _db
+    if _db is None and database_url and database_name:
+        _client = MongoClient(database_url)
+        _db = _client[database_name]
+    return _db
+
+def __getattr__(name):
+    # keep `from database import db` working without connecting at import time
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Async (Motor) client, created by init_async_db() at app startup
+_async_client = None
+async_db = None
+
+mongo_max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+mongo_min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", 10))
+
+async def init_async_db():
+    """Create the Motor client, warm its pool and bind the async database handle"""
+    global _async_client, async_db
+    if database_url and database_name and _async_client is None:
+        _async_client = AsyncIOMotorClient(
+            database_url,
+            maxPoolSize=mongo_max_pool_size,
+            minPoolSize=mongo_min_pool_size,
+            serverSelectionTimeoutMS=3000,
+        )
+        # fail fast and open the first connection before traffic arrives
+        await _async_client.admin.command("ping")
+        async_db = _async_client[database_name]
+    return _async_client
+
+def close_async_db():
+    """Close the Motor client and release its connection pool"""
+    global _async_client, async_db
+    if _async_client is not None:
+        _async_client.close()
+    _async_client = None
+    async_db = None
+
+async def ensure_indexes_async(indexes: dict):
+    """Create indexes given as {collection_name: [keys, ...]}; existing indexes are left as-is"""
+    adb = _require_async_db()
+    for collection_name, key_specs in indexes.items():
+        for keys in key_specs:
+            await adb[collection_name].create_index(keys)
+
+def _require_async_db():
+    if async_db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    return async_db
 
 # Helper functions for common database operations
 def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
+    db = get_db()
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
@@ -45,6 +100,7 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
 
 def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
+    db = get_db()
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
@@ -53,3 +109,96 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
         cursor = cursor.limit(limit)
     
     return list(cursor)
+
+# Async helpers (Motor) for use inside async endpoints
+async def create_document_async(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp"""
+    adb = _require_async_db()
+
+    if isinstance(data, BaseModel):
+        data_dict = data.model_dump()
+    else:
+        data_dict = data.copy()
+
+    data_dict['created_at'] = datetime.now(timezone.utc)
+    data_dict['updated_at'] = datetime.now(timezone.utc)
+
+    result = await adb[collection_name].insert_one(data_dict)
+    return str(result.inserted_id)
+
+async def create_documents_async(collection_name: str, items: List[Union[BaseModel, dict]]):
+    """Insert many documents with timestamps in a single round trip"""
+    adb = _require_async_db()
+    if not items:
+        return []
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for data in items:
+        data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+
+    result = await adb[collection_name].insert_many(docs, ordered=False)
+    return [str(i) for i in result.inserted_ids]
+
+def _documents_pipeline(filter_dict: dict = None, limit: int = None, fields: List[str] = None):
+    pipeline = [{"$match": filter_dict or {}}]
+    if limit:
+        pipeline.append({"$limit": limit})
+    if fields:
+        # fetch only the requested fields; `id` is always returned
+        pipeline.append({"$project": {f: 1 for f in fields}})
+    pipeline += [
+        {"$addFields": {"id": {"$toString": "$_id"}}},
+        {"$project": {"_id": 0}},
+    ]
+    return pipeline
+
+async def get_documents_async(collection_name: str, filter_dict: dict = None, limit: int = None, fields: List[str] = None):
+    """Get documents from collection, with `_id` returned as a string `id`"""
+    adb = _require_async_db()
+    pipeline = _documents_pipeline(filter_dict, limit, fields)
+    return await adb[collection_name].aggregate(pipeline).to_list(None)
+
+async def iter_documents_async(collection_name: str, filter_dict: dict = None, fields: List[str] = None):
+    """Open a cursor over collection and return an async iterator of its documents, with `_id` as a string `id`
+
+    The first batch is fetched before returning, so a missing database or a failing
+    query raises here rather than partway through a streamed response.
+    """
+    adb = _require_async_db()
+    pipeline = _documents_pipeline(filter_dict, fields=fields)
+    cursor = adb[collection_name].aggregate(pipeline)
+    try:
+        first = await cursor.next()
+    except StopAsyncIteration:
+        first = None
+
+    async def documents():
+        if first is None:
+            return
+        yield first
+        async for doc in cursor:
+            yield doc
+
+    return documents()
+
+async def count_documents_async(collection_name: str, filter_dict: dict = None):
+    """Count documents in collection; unfiltered counts come from collection metadata"""
+    adb = _require_async_db()
+    if not filter_dict:
+        return await adb[collection_name].estimated_document_count()
+    return await adb[collection_name].count_documents(filter_dict)
+
+async def sum_field_async(collection_name: str, field: str, filter_dict: dict = None):
+    """Sum a numeric field across a collection server-side"""
+    adb = _require_async_db()
+
+    pipeline = [{"$group": {"_id": None, "total": {"$sum": f"${field}"}}}]
+    if filter_dict:
+        pipeline.insert(0, {"$match": filter_dict})
+
+    result = await adb[collection_name].aggregate(pipeline).to_list(1)
+    return float(result[0]["total"]) if result else 0.0
@@ -0,0 +1,21 @@
+"""
+Gunicorn config for production: one uvicorn worker per CPU core.
+
+    gunicorn main:app -c gunicorn.conf.py
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+# UvicornWorker ignores worker_connections; this subclass caps concurrency via limit_concurrency
+worker_class = "uvicorn_worker.LimitedUvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+keepalive = 5
+
+# workers read this to decide whether the in-memory response cache is safe
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# every worker owns its Motor pool, so split the default pool budget between them
+os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(max(10, 100 // workers)))
+os.environ.setdefault("MONGO_MIN_POOL_SIZE", str(max(1, 10 // workers)))
@@ -1,182 +1,308 @@
 import os
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+import asyncio
+import orjson
+import ormsgpack
+from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from typing import Optional, List
-from bson import ObjectId
+from pydantic import TypeAdapter, ValidationError
+
+from database import (
+    init_async_db,
+    ensure_indexes_async,
+    close_async_db,
+    create_document_async,
+    create_documents_async,
+    get_documents_async,
+    iter_documents_async,
+    count_documents_async,
+    sum_field_async,
+)
+from schemas import Client, Project, TimeLog, Invoice, Payment
+from cors import CORSMiddleware
+from compression import GZipMiddleware
+from response_cache import cache, ResponseCacheMiddleware, init_cache, close_cache
 
-from database import db, create_document, get_documents
+app = FastAPI(title="Freelancer Manager API", default_response_class=ORJSONResponse)
 
-app = FastAPI(title="Freelancer Manager API")
+# registered before CORS so cached responses still pass through CORSMiddleware
+app.add_middleware(ResponseCacheMiddleware, router=app.router)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(CORSMiddleware)
+
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5, exclude_paths=["/api/timelogs/stream"])
+
+
+# indexes backing the list endpoint filters
+INDEXES = {
+    "project": ["client_id"],
+    "timelog": [[("project_id", 1), ("client_id", 1)], "client_id"],
+    "invoice": [[("client_id", 1), ("status", 1)]],
+    "payment": [[("client_id", 1), ("invoice_id", 1)], "invoice_id"],
+}
+
+
+@app.on_event("startup")
+async def startup():
+    # build and ping the Motor client before serving so the pool is ready for the first request
+    app.state.mongo = await init_async_db()
+    if app.state.mongo is not None:
+        await ensure_indexes_async(INDEXES)
+    init_cache()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    close_async_db()
+    await close_cache()
 
-# Utility to validate object id strings
-
-def to_object_id(id_str: str) -> ObjectId:
-    try:
-        return ObjectId(id_str)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id format")
-
-
-# --- Minimal DTOs for create endpoints ---
-class ClientCreate(BaseModel):
-    name: str
-    email: Optional[str] = None
-    phone: Optional[str] = None
-    notes: Optional[str] = None
-
-class ProjectCreate(BaseModel):
-    name: str
-    client_id: Optional[str] = None
-    hourly_rate: Optional[float] = None
-    status: Optional[str] = "active"
-    notes: Optional[str] = None
-
-class TimeLogCreate(BaseModel):
-    project_id: str
-    client_id: Optional[str] = None
-    date: str
-    hours: float
-    description: Optional[str] = None
-    hourly_rate: Optional[float] = None
-
-class InvoiceCreate(BaseModel):
-    client_id: str
-    project_id: Optional[str] = None
-    number: Optional[str] = None
-    amount: float
-    due_date: Optional[str] = None
-    status: Optional[str] = "draft"
-    notes: Optional[str] = None
-
-class PaymentCreate(BaseModel):
-    invoice_id: Optional[str] = None
-    client_id: Optional[str] = None
-    amount: float
-    method: Optional[str] = None
-    date: str
-    notes: Optional[str] = None
+
+# Utility to turn a `fields=name,email` query value into a projection list
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    if any(n.startswith("$") or "" in n.split(".") for n in names):
+        raise HTTPException(status_code=400, detail="Invalid field name")
+    # Mongo rejects a projection containing both a path and one of its sub-paths
+    for name in names:
+        if any(other.startswith(name + ".") for other in names):
+            raise HTTPException(status_code=400, detail=f"Overlapping fields: {name}")
+    return names or None
+
+
+# Utility to validate create payloads straight from the raw body: a single pass through
+# Pydantic's JSON parser instead of json.loads followed by dict validation
+
+def json_body(model, many: bool = False):
+    adapter = TypeAdapter(List[model] if many else model)
+
+    async def parse(request: Request):
+        try:
+            return adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors()])
+
+    return Depends(parse)
+
+def json_body_schema(model, many: bool = False) -> dict:
+    schema = model.model_json_schema()
+    if many:
+        schema = {"type": "array", "items": schema}
+    return {
+        "requestBody": {"required": True, "content": {"application/json": {"schema": schema}}},
+        # json_body raises RequestValidationError, but FastAPI only documents 422 for declared params
+        "responses": {
+            "422": {
+                "description": "Validation Error",
+                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/HTTPValidationError"}}},
+            }
+        },
+    }
+
+
+# MessagePack for service-to-service callers that send `Accept: application/msgpack`;
+# everyone else keeps getting JSON
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return ormsgpack.packb(content, option=ormsgpack.OPT_SERIALIZE_PYDANTIC | ormsgpack.OPT_NAIVE_UTC)
+
+def _accept_quality(accept: str, media_type: str) -> float:
+    # q of the most specific range matching media_type (exact > type/* > */*)
+    main_type = media_type.split("/", 1)[0]
+    best, best_q = -1, 0.0
+    for part in accept.split(","):
+        range_, *params = [p.strip() for p in part.split(";")]
+        range_ = range_.lower()
+        if range_ == media_type:
+            specificity = 2
+        elif range_ == f"{main_type}/*":
+            specificity = 1
+        elif range_ == "*/*":
+            specificity = 0
+        else:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if specificity > best:
+            best, best_q = specificity, q
+    return best_q
+
+def wants_msgpack(accept: str) -> bool:
+    # only when msgpack is named explicitly and ranked at least as high as JSON
+    if MSGPACK_MEDIA_TYPE not in accept.lower():
+        return False
+    msgpack_q = _accept_quality(accept, MSGPACK_MEDIA_TYPE)
+    return msgpack_q > 0 and msgpack_q >= _accept_quality(accept, "application/json")
+
+def negotiate(request: Request, content):
+    if wants_msgpack(request.headers.get("accept", "")):
+        return MsgPackResponse(content, headers={"Vary": "Accept"})
+    # returning a Response directly skips FastAPI's jsonable_encoder pass
+    return ORJSONResponse(content, headers={"Vary": "Accept"})
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Freelancer Manager API"}
 
 
 # --- CRUD: Clients ---
-@app.post("/api/clients")
-def create_client(payload: ClientCreate):
-    doc_id = create_document("client", payload.model_dump())
+@app.post("/api/clients", openapi_extra=json_body_schema(Client))
+async def create_client(payload: Client = json_body(Client)):
+    doc_id = await create_document_async("client", payload.model_dump(mode="json", exclude_none=True))
     return {"id": doc_id}
 
-@app.get("/api/clients")
-def list_clients():
-    items = get_documents("client")
-    for i in items:
-        i["id"] = str(i.pop("_id"))
-    return items
+@app.post("/api/clients:bulk", openapi_extra=json_body_schema(Client, many=True))
+async def create_clients_bulk(payloads: List[Client] = json_body(Client, many=True)):
+    ids = await create_documents_async("client", [p.model_dump(mode="json", exclude_none=True) for p in payloads])
+    return {"ids": ids}
+
+@app.get("/api/clients", response_model=None)
+@cache(ttl=30)
+async def list_clients(request: Request, fields: Optional[str] = None):
+    items = await get_documents_async("client", fields=parse_fields(fields))
+    return negotiate(request, items)
 
 
 # --- CRUD: Projects ---
-@app.post("/api/projects")
-def create_project(payload: ProjectCreate):
-    data = payload.model_dump()
+@app.post("/api/projects", openapi_extra=json_body_schema(Project))
+async def create_project(payload: Project = json_body(Project)):
+    data = payload.model_dump(mode="json", exclude_none=True)
     if data.get("client_id"):
         # store as raw string; viewer keeps string ids
         pass
-    doc_id = create_document("project", data)
+    doc_id = await create_document_async("project", data)
     return {"id": doc_id}
 
-@app.get("/api/projects")
-def list_projects(client_id: Optional[str] = None):
+@app.post("/api/projects:bulk", openapi_extra=json_body_schema(Project, many=True))
+async def create_projects_bulk(payloads: List[Project] = json_body(Project, many=True)):
+    ids = await create_documents_async("project", [p.model_dump(mode="json", exclude_none=True) for p in payloads])
+    return {"ids": ids}
+
+@app.get("/api/projects", response_model=None)
+@cache(ttl=30)
+async def list_projects(request: Request, client_id: Optional[str] = None, fields: Optional[str] = None):
     filt = {"client_id": client_id} if client_id else {}
-    items = get_documents("project", filt)
-    for i in items:
-        i["id"] = str(i.pop("_id"))
-    return items
+    items = await get_documents_async("project", filt, fields=parse_fields(fields))
+    return negotiate(request, items)
 
 
 # --- Time Logs ---
-@app.post("/api/timelogs")
-def create_timelog(payload: TimeLogCreate):
-    data = payload.model_dump()
-    doc_id = create_document("timelog", data)
+@app.post("/api/timelogs", openapi_extra=json_body_schema(TimeLog))
+async def create_timelog(payload: TimeLog = json_body(TimeLog)):
+    data = payload.model_dump(mode="json", exclude_none=True)
+    doc_id = await create_document_async("timelog", data)
     return {"id": doc_id}
 
-@app.get("/api/timelogs")
-def list_timelogs(project_id: Optional[str] = None, client_id: Optional[str] = None):
+@app.post("/api/timelogs:bulk", openapi_extra=json_body_schema(TimeLog, many=True))
+async def create_timelogs_bulk(payloads: List[TimeLog] = json_body(TimeLog, many=True)):
+    ids = await create_documents_async("timelog", [p.model_dump(mode="json", exclude_none=True) for p in payloads])
+    return {"ids": ids}
+
+@app.get("/api/timelogs", response_model=None)
+@cache(ttl=30)
+async def list_timelogs(request: Request, project_id: Optional[str] = None, client_id: Optional[str] = None, fields: Optional[str] = None):
     filt = {}
     if project_id:
         filt["project_id"] = project_id
     if client_id:
         filt["client_id"] = client_id
-    items = get_documents("timelog", filt)
-    for i in items:
-        i["id"] = str(i.pop("_id"))
-    return items
+    items = await get_documents_async("timelog", filt, fields=parse_fields(fields))
+    return negotiate(request, items)
+
+@app.get("/api/timelogs/stream")
+async def stream_timelogs(project_id: Optional[str] = None, client_id: Optional[str] = None, fields: Optional[str] = None):
+    # NDJSON export straight from the cursor, one document per line
+    filt = {}
+    if project_id:
+        filt["project_id"] = project_id
+    if client_id:
+        filt["client_id"] = client_id
+
+    # open the cursor up front so DB errors surface as an error status, not a truncated 200
+    docs = await iter_documents_async("timelog", filt, fields=parse_fields(fields))
+
+    async def lines():
+        async for doc in docs:
+            yield orjson.dumps(doc) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 # --- Invoices ---
-@app.post("/api/invoices")
-def create_invoice(payload: InvoiceCreate):
-    data = payload.model_dump()
-    doc_id = create_document("invoice", data)
+@app.post("/api/invoices", openapi_extra=json_body_schema(Invoice))
+async def create_invoice(payload: Invoice = json_body(Invoice)):
+    data = payload.model_dump(mode="json", exclude_none=True)
+    doc_id = await create_document_async("invoice", data)
     return {"id": doc_id}
 
-@app.get("/api/invoices")
-def list_invoices(client_id: Optional[str] = None, status: Optional[str] = None):
+@app.post("/api/invoices:bulk", openapi_extra=json_body_schema(Invoice, many=True))
+async def create_invoices_bulk(payloads: List[Invoice] = json_body(Invoice, many=True)):
+    ids = await create_documents_async("invoice", [p.model_dump(mode="json", exclude_none=True) for p in payloads])
+    return {"ids": ids}
+
+@app.get("/api/invoices", response_model=None)
+@cache(ttl=30)
+async def list_invoices(request: Request, client_id: Optional[str] = None, status: Optional[str] = None, fields: Optional[str] = None):
     filt = {}
     if client_id:
         filt["client_id"] = client_id
     if status:
         filt["status"] = status
-    items = get_documents("invoice", filt)
-    for i in items:
-        i["id"] = str(i.pop("_id"))
-    return items
+    items = await get_documents_async("invoice", filt, fields=parse_fields(fields))
+    return negotiate(request, items)
 
 
 # --- Payments ---
-@app.post("/api/payments")
-def create_payment(payload: PaymentCreate):
-    data = payload.model_dump()
-    doc_id = create_document("payment", data)
+@app.post("/api/payments", openapi_extra=json_body_schema(Payment))
+async def create_payment(payload: Payment = json_body(Payment)):
+    data = payload.model_dump(mode="json", exclude_none=True)
+    doc_id = await create_document_async("payment", data)
     return {"id": doc_id}
 
-@app.get("/api/payments")
-def list_payments(client_id: Optional[str] = None, invoice_id: Optional[str] = None):
+@app.post("/api/payments:bulk", openapi_extra=json_body_schema(Payment, many=True))
+async def create_payments_bulk(payloads: List[Payment] = json_body(Payment, many=True)):
+    ids = await create_documents_async("payment", [p.model_dump(mode="json", exclude_none=True) for p in payloads])
+    return {"ids": ids}
+
+@app.get("/api/payments", response_model=None)
+@cache(ttl=30)
+async def list_payments(request: Request, client_id: Optional[str] = None, invoice_id: Optional[str] = None, fields: Optional[str] = None):
     filt = {}
     if client_id:
         filt["client_id"] = client_id
     if invoice_id:
         filt["invoice_id"] = invoice_id
-    items = get_documents("payment", filt)
-    for i in items:
-        i["id"] = str(i.pop("_id"))
-    return items
+    items = await get_documents_async("payment", filt, fields=parse_fields(fields))
+    return negotiate(request, items)
 
 
 # --- Simple metrics endpoints ---
 @app.get("/api/metrics")
-def get_metrics():
-    # totals for dashboard
-    clients = len(get_documents("client"))
-    projects = len(get_documents("project"))
-    timelogs = get_documents("timelog")
-    invoices = get_documents("invoice")
-    payments = get_documents("payment")
-
-    total_hours = sum(float(t.get("hours", 0)) for t in timelogs)
-    invoice_total = sum(float(i.get("amount", 0)) for i in invoices)
-    payment_total = sum(float(p.get("amount", 0)) for p in payments)
+@cache(ttl=10)
+async def get_metrics():
+    # totals for dashboard, reduced server-side
+    clients, projects, total_hours, invoice_total, payment_total = await asyncio.gather(
+        count_documents_async("client"),
+        count_documents_async("project"),
+        sum_field_async("timelog", "hours"),
+        sum_field_async("invoice", "amount"),
+        sum_field_async("payment", "amount"),
+    )
     outstanding = invoice_total - payment_total
 
     return {
@@ -192,4 +318,14 @@ def get_metrics():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # the in-memory response cache is per process, so only fan out by default when Redis is shared
+    workers = int(os.getenv("WEB_CONCURRENCY", 2 if os.getenv("REDIS_URL") else 1))
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+    )
@@ -0,0 +1,253 @@
+"""
+Response Cache
+
+Short-lived response cache with ETag / If-None-Match support for GET endpoints.
+Mark an endpoint with @cache(ttl=...) and register ResponseCacheMiddleware.
+Entries are keyed on path, query string and Accept header.
+
+Entries live in Redis when REDIS_URL is set, otherwise in process memory.
+The in-memory store cannot see writes handled by other workers, so without
+REDIS_URL the cache is disabled whenever WEB_CONCURRENCY is above 1.
+Any successful write request bumps a generation counter so cached lists and
+metrics never outlive the data they were built from. Store errors are logged
+and the request is served uncached.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis.asyncio as aioredis
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+redis_url = os.getenv("REDIS_URL")
+web_concurrency = int(os.getenv("WEB_CONCURRENCY", 1))
+memory_max_entries = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256))
+
+_GEN_KEY = "respcache:gen"
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def cache(ttl: int):
+    """Mark an endpoint as cacheable for `ttl` seconds"""
+    def decorator(func):
+        func._cache_ttl = ttl
+        return func
+    return decorator
+
+
+class _RedisStore:
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url)
+
+    async def generation(self) -> int:
+        return int(await self._redis.get(_GEN_KEY) or 0)
+
+    async def bump(self):
+        await self._redis.incr(_GEN_KEY)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def setex(self, key: str, ttl: int, value: bytes):
+        await self._redis.setex(key, ttl, value)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class _MemoryStore:
+    """LRU-bounded store; expired entries are pruned on insert"""
+
+    def __init__(self, max_entries: int = memory_max_entries):
+        self._gen = 0
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def generation(self) -> int:
+        return self._gen
+
+    async def bump(self):
+        self._gen += 1
+        self._entries.clear()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def setex(self, key: str, ttl: int, value: bytes):
+        now = time.monotonic()
+        for k in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[k]
+        self._entries[key] = (now + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def close(self):
+        self._entries.clear()
+
+
+_store = None
+
+
+def init_cache():
+    """Create the cache backend (Redis if REDIS_URL is set, memory for a single worker)"""
+    global _store
+    if _store is None:
+        if redis_url:
+            _store = _RedisStore(redis_url)
+        elif web_concurrency <= 1:
+            _store = _MemoryStore()
+        else:
+            logger.info("Response cache disabled: %d workers and no REDIS_URL", web_concurrency)
+    return _store
+
+
+async def close_cache():
+    """Release the cache backend"""
+    global _store
+    if _store is not None:
+        await _store.close()
+    _store = None
+
+
+# Stored value layout: b"<etag>\n<content-type>\n<body>"
+def _pack(etag: str, content_type: bytes, body: bytes) -> bytes:
+    return etag.encode() + b"\n" + content_type + b"\n" + body
+
+
+def _unpack(value: bytes):
+    etag, content_type, body = value.split(b"\n", 2)
+    return etag.decode(), content_type, body
+
+
+def _etag_matches(if_none_match: Optional[bytes], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.decode("latin-1").split(",")]
+    return f'"{etag}"' in candidates or "*" in candidates
+
+
+class ResponseCacheMiddleware:
+    """Pure ASGI middleware serving @cache endpoints from the response cache"""
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    def _ttl_for(self, scope) -> Optional[int]:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(getattr(route, "endpoint", None), "_cache_ttl", None)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _store is None:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        if method in _WRITE_METHODS:
+            await self._handle_write(scope, receive, send)
+            return
+
+        ttl = self._ttl_for(scope) if method == "GET" else None
+        if ttl is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if_none_match = headers.get(b"if-none-match")
+        try:
+            generation = await _store.generation()
+            # Accept is part of the key since endpoints may negotiate the response format
+            key = "respcache:" + hashlib.blake2b(
+                f"{generation}:{scope['path']}?".encode()
+                + scope.get("query_string", b"")
+                + b"|" + headers.get(b"accept", b""),
+                digest_size=16,
+            ).hexdigest()
+            cached = await _store.get(key)
+        except Exception:
+            logger.warning("Response cache unavailable, serving uncached", exc_info=True)
+            await self.app(scope, receive, send)
+            return
+
+        if cached is not None:
+            etag, content_type, body = _unpack(cached)
+            await self._send_cached(send, etag, content_type, body, if_none_match)
+            return
+
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                body = b"".join(chunks)
+                if start["status"] != 200:
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+                content_type = dict(start["headers"]).get(b"content-type", b"application/json")
+                try:
+                    await _store.setex(key, ttl, _pack(etag, content_type, body))
+                except Exception:
+                    logger.warning("Response cache unavailable, response not stored", exc_info=True)
+                await self._send_cached(send, etag, content_type, body, if_none_match, start["headers"])
+                return
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+    async def _handle_write(self, scope, receive, send):
+        async def watch(message):
+            # invalidate before the client can see the write succeed
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                try:
+                    await _store.bump()
+                except Exception:
+                    logger.warning("Response cache unavailable, generation not bumped", exc_info=True)
+            await send(message)
+
+        await self.app(scope, receive, watch)
+
+    @staticmethod
+    async def _send_cached(send, etag, content_type, body, if_none_match, headers=None):
+        etag_header = f'"{etag}"'.encode()
+        # entries are keyed on Accept, so every response from the cache says so, 304s included
+        vary_header = (b"vary", b"Accept")
+        if _etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag_header), vary_header]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if headers is None:
+            headers = [(b"content-type", content_type)]
+        headers = [(k, v) for k, v in headers if k not in (b"content-length", b"etag")]
+        if not any(k == b"vary" and b"accept" in v.lower() for k, v in headers):
+            headers.append(vary_header)
+        headers += [(b"content-length", str(len(body)).encode()), (b"etag", etag_header)]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -12,7 +12,7 @@ Each Pydantic model represents a collection in MongoDB. The collection name is t
 
 from pydantic import BaseModel, Field
 from typing import Optional, Literal
-from datetime import date
+import datetime
 
 class Client(BaseModel):
     name: str = Field(..., description="Client or company name")
@@ -30,7 +30,7 @@ class Project(BaseModel):
 class TimeLog(BaseModel):
     project_id: str = Field(..., description="Related project id (string ObjectId)")
     client_id: Optional[str] = Field(None, description="Related client id (string ObjectId)")
-    date: date = Field(..., description="Work date")
+    date: datetime.date = Field(..., description="Work date")
     hours: float = Field(..., gt=0, description="Hours worked")
     description: Optional[str] = Field(None, description="Description of work performed")
     hourly_rate: Optional[float] = Field(None, ge=0, description="Hourly rate used for this entry")
@@ -40,7 +40,7 @@ class Invoice(BaseModel):
     project_id: Optional[str] = Field(None, description="Project id (string ObjectId)")
     number: Optional[str] = Field(None, description="Invoice number")
     amount: float = Field(..., ge=0, description="Invoice total amount")
-    due_date: Optional[date] = Field(None, description="Due date")
+    due_date: Optional[datetime.date] = Field(None, description="Due date")
     status: Literal["draft", "sent", "paid", "overdue"] = Field("draft", description="Invoice status")
     notes: Optional[str] = Field(None, description="Invoice notes")
 
@@ -49,5 +49,5 @@ class Payment(BaseModel):
     client_id: Optional[str] = Field(None, description="Client id (string ObjectId)")
     amount: float = Field(..., ge=0, description="Payment amount")
     method: Optional[str] = Field(None, description="Payment method (bank, card, cash, etc.)")
-    date: date = Field(..., description="Payment date")
+    date: datetime.date = Field(..., description="Payment date")
     notes: Optional[str] = Field(None, description="Payment notes")
@@ -0,0 +1,17 @@
+"""
+Gunicorn worker class for uvicorn with a per-worker concurrency cap.
+
+gunicorn's worker_connections only applies to eventlet/gevent workers, so the cap
+is passed to uvicorn as limit_concurrency instead; requests beyond it get a 503.
+"""
+
+import os
+
+from uvicorn.workers import UvicornWorker
+
+
+class LimitedUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "limit_concurrency": int(os.getenv("WORKER_CONNECTIONS", 1000)),
+    }